@@ -129,26 +129,45 @@ def PrintRegs(regs):
         else:
             return
 
-def PrintRegPretty(regs, reg_addr, value):
-    for reg in regs:
-        if(reg):
-            if(reg.addr == reg_addr):
-                string_temp = RegStringify(reg) + f' = 0x{value:x}'
-                print(string_temp)
+# Reorganize the register list (array of structs) into parallel lists (struct of arrays) for PrintRegPretty:
+# entry i of every list belongs to the same register, and "index" maps a register address to i.
+# The fields of a register are again parallel tuples of labels, masks and shifts.
+def IndexRegs(regs):
+    regs_index = {
+        'index':  {},
+        'header': [],   # register description, see RegStringify()
+        'labels': [],   # field names with bit range, e.g. "RESET (15)" or "reserved (4-0)"
+        'masks':  [],
+        'shifts': [],
+    }
 
-                for field in reg.fields:
-                    if(field):
-                        field_value = ExtractFieldValue(field, value)
+    for reg in regs:
+        if(not reg):
+            break
+
+        fields = []
+        for field in reg.fields:
+            if(not field):
+                break
+            fields.append(field)
+
+        regs_index['index'][reg.addr] = len(regs_index['header'])
+        regs_index['header'].append(RegStringify(reg))
+        regs_index['labels'].append(tuple(f'{field.name} (' + (f'{field.shift}' if field.width==1 else f'{field.shift+field.width-1}-{field.shift}') + ')' for field in fields))
+        regs_index['masks'].append(tuple(field.mask for field in fields))
+        regs_index['shifts'].append(tuple(field.shift for field in fields))
+
+    return regs_index
+
+def PrintRegPretty(regs_index, reg_addr, value):   # regs_index: see IndexRegs()
+    i = regs_index['index'].get(reg_addr)
+    if(i is None):
+        return -1
 
-                        string_temp = f'\t{field.name} (' + (f'{field.shift}' if field.width==1 else f'{field.shift+field.width-1}-{field.shift}') + f') = 0x{field_value:x}'
-                        print(string_temp)
+    print(regs_index['header'][i] + f' = 0x{value:x}')
 
-                    else:
-                        return
-        else:
-            return
-    else:
-        return -1
+    for label, mask, shift in zip(regs_index['labels'][i], regs_index['masks'][i], regs_index['shifts'][i]):
+        print(f'\t{label} = 0x{(value & mask) >> shift:x}')
 
 
 def csv2regs(file_name):
@@ -234,6 +253,7 @@ if __name__ == '__main__':
         PrintRegs(regs)
 
         if(__CSV2REGS_DEBUG__):
-            PrintRegPretty(regs, 0, 1)
-            PrintRegPretty(regs, 2, 0xdeadbeef)
-            PrintRegPretty(regs, 18, 0xa5a5)
+            regs_index = IndexRegs(regs)
+            PrintRegPretty(regs_index, 0, 1)
+            PrintRegPretty(regs_index, 2, 0xdeadbeef)
+            PrintRegPretty(regs_index, 18, 0xa5a5)
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+
+# MIT License
+
+# Copyright (c) 2022 Wesley Becker
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# MDIO access through the MSP430 of TI's USB2MDIO boards: request/reply packet
+# encoding and the (threaded) COM port transport. The CLI lives in usb2mdio.py.
+
+import queue
+import threading
+import struct
+import binascii
+
+
+verbose = False
+pipeline = True     # send request sequences/batches back-to-back and collect the replies afterwards.
+                    # Set to False for firmware that needs each reply to go out before the next request comes in
+
+# request packet prefix (b'<PP>') and suffix (b'<X>/'), indexed with (phy_addr, ext)
+_prefix_cache = {}
+
+_tx_buf = bytearray(16)   # reused for every request, longest one is <PP><AAAA><VVVV><X>/
+_HEX = b'0123456789abcdef'
+_NIBBLES = bytes.maketrans(b'0123456789abcdefABCDEF', bytes(range(16)) + bytes(range(10, 16)))   # hex digit -> value
+
+# ---------- Function definitions ----------
+
+# Runs the serial I/O in background threads: requests are queued for a writer thread, while a reader
+# thread continuously splits the incoming bytes into replies (terminated by 0x0a) and queues them.
+# Offers the subset of the serial.Serial interface used here, so it can be used in place of the COM port.
+class SerialWorker:
+    port     = None
+    timeout  = None   # max. time to wait for a reply
+    tx_queue = None   # outbound request packets
+    rx_queue = None   # received reply packets
+
+    def __init__(self, port, timeout):
+        self.port     = port
+        self.timeout  = timeout
+        self.tx_queue = queue.Queue()
+        self.rx_queue = queue.Queue()
+
+        self._rx_frame   = bytearray()
+        self._rx_lock    = threading.Lock()
+        self._rx_cond    = threading.Condition(self._rx_lock)
+        self._rx_flushes = 0    # incremented by reset_input_buffer(), see _RxLoop()
+        self._rx_reading = 0    # value of _rx_flushes when the reader started its current read()
+        self._running    = False
+        self._error      = None # exception that stopped the reader/writer thread, re-raised to the caller
+        self._rx_thread  = threading.Thread(target=self._RxLoop, daemon=True)
+        self._tx_thread  = threading.Thread(target=self._TxLoop, daemon=True)
+
+    def start(self):
+        self._running = True
+        self._rx_thread.start()
+        self._tx_thread.start()
+
+    # Remember why a worker thread stopped and wake up whoever waits for it
+    def _Fail(self, error):
+        with self._rx_cond:
+            if(self._error is None):
+                self._error = error
+            self._rx_cond.notify_all()
+        self.rx_queue.put(None)
+
+    # Re-raise the exception that stopped a worker thread (e.g. serial.SerialException on unplug), if any
+    def _CheckError(self):
+        if(self._error is not None):
+            raise self._error
+
+    def _RxLoop(self):
+        try:
+            self._RxLoopRun()
+        except Exception as error:
+            self._Fail(error)
+
+    def _RxLoopRun(self):
+        while(self._running):
+            with self._rx_cond:
+                flushes = self._rx_flushes
+                self._rx_reading = flushes
+                self._rx_cond.notify_all()
+
+            data = self.port.read(self.port.in_waiting or 1)   # blocking, releases the GIL
+            if(not data):
+                continue
+
+            with self._rx_lock:
+                # data read before a reset_input_buffer() returned is stale (e.g. a late reply), drop it
+                if(flushes != self._rx_flushes):
+                    continue
+
+                self._rx_frame.extend(data)
+                while(1):
+                    end = self._rx_frame.find(b'\n')
+                    if(end < 0):
+                        break
+                    self.rx_queue.put(bytes(self._rx_frame[:end+1]))
+                    del self._rx_frame[:end+1]
+
+    def _TxLoop(self):
+        try:
+            while(1):
+                pkt_request = self.tx_queue.get()
+                if(pkt_request is None):
+                    return
+                self.port.write(pkt_request)
+        except Exception as error:
+            self._Fail(error)
+
+    # Queue a request, its reply must be collected with receive()
+    def write(self, pkt_request):
+        self._CheckError()
+        self.tx_queue.put(bytes(pkt_request))   # copy, callers reuse their buffers
+
+    # Next reply, or None if none arrived within timeout
+    def receive(self):
+        self._CheckError()
+        try:
+            pkt_reply = self.rx_queue.get(timeout=self.timeout)
+        except queue.Empty:
+            pkt_reply = None
+        self._CheckError()
+        return pkt_reply
+
+    def reset_input_buffer(self):
+        with self._rx_cond:
+            self._CheckError()
+            self._rx_flushes += 1
+            self.port.reset_input_buffer()
+            self._rx_frame.clear()
+            while(1):
+                try:
+                    self.rx_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            # Whatever the reader's current read() returns is dropped, so don't let it pick up the next reply:
+            # abort it and wait until the reader is reading again, this time for the new flush generation
+            if(self._running):
+                if(hasattr(self.port, 'cancel_read')):
+                    self.port.cancel_read()
+                self._rx_cond.wait_for(lambda: self._rx_reading == self._rx_flushes or self._error is not None, timeout=self.timeout)
+                self._CheckError()
+
+    def close(self):
+        self._running = False
+        self.tx_queue.put(None)
+        self._tx_thread.join()
+        self._rx_thread.join()
+        self.port.close()
+
+def DrainReplies(com_port, n):
+    global verbose
+
+    replies = []
+    for i in range(0, n):
+        pkt_reply = com_port.receive()    # blocks until the reply arrived (or reply_timeout)
+        if(pkt_reply is None):
+            # The reply may still come in late and would then be taken for the reply of a later request.
+            # Flush until the line stays quiet for a whole timeout. Any remaining replies of this batch are lost too.
+            while(1):
+                com_port.reset_input_buffer()
+                if(com_port.receive() is None):
+                    break
+            replies.extend([None] * (n - i))
+            break
+
+        if(verbose == True):
+            print(pkt_reply.decode('utf-8'))
+
+        pkt_reply = pkt_reply.translate(None, b'\r')   # for whatever reason, MSP sends a carriage return within reply for addr 0x1
+        if(len(pkt_reply) != 5):
+            pkt_reply = None
+        replies.append(pkt_reply)
+    return replies
+
+# Value of the 4 hex digits at the start of data (e.g. a reply), None if they aren't all hex digits
+def Hex4(data):
+    t = data[0:4].translate(_NIBBLES)
+    if(len(t) != 4 or max(t) > 15):     # non-hex bytes are left as they are by translate()
+        return None
+    return (t[0] << 12) | (t[1] << 8) | (t[2] << 4) | t[3]
+
+# Decode the values of a list of replies (see DrainReplies) in one go. Invalid/missing replies give None
+def DecodeReplies(pkt_replies):
+    valid = [i for i in range(0, len(pkt_replies)) if(pkt_replies[i] is not None and pkt_replies[i][4] == 0x0a)]
+    reply_values = [None] * len(pkt_replies)
+
+    try:
+        data = binascii.unhexlify(b''.join([pkt_replies[i][0:4] for i in valid]))
+        for i, value in zip(valid, struct.unpack(f'>{len(valid)}H', data)):
+            reply_values[i] = value
+    except ValueError:
+        # some reply isn't hex at all, decode them one by one
+        for i in valid:
+            try:
+                reply_values[i] = int(pkt_replies[i][0:4], 16)
+            except ValueError:
+                pass
+
+    return reply_values
+
+def ReceiveRegReply(com_port):
+    return DrainReplies(com_port, 1)[0]
+
+def ClearPrefixCache():
+    _prefix_cache.clear()
+
+def GetRequestAffixes(phy_addr, ext):
+    affixes = _prefix_cache.get((phy_addr, ext))
+    if(affixes is None):
+        affixes = (b'%02d' % phy_addr, ext.encode('utf-8') + b'/')
+        _prefix_cache[(phy_addr, ext)] = affixes
+    return affixes
+
+# Write the 4 hex digits of v into buf at offset off. Raises ValueError if v doesn't fit into 16 bits
+def WriteHex4(buf, off, v):
+    if(not 0 <= v <= 0xFFFF):
+        raise ValueError(f'{v:#x} does not fit into 4 hex digits')
+
+    buf[off]   = _HEX[(v >> 12) & 0xF]
+    buf[off+1] = _HEX[(v >> 8) & 0xF]
+    buf[off+2] = _HEX[(v >> 4) & 0xF]
+    buf[off+3] = _HEX[v & 0xF]
+
+# Write a request packet <PP><AAAA>[VVVV]<X>/ into buf at offset off and return the offset after it.
+# addr and value must be within 0..0xFFFF and the packet must fit into buf (ValueError otherwise)
+def FormatRequest(buf, off, prefix, addr, value, suffix):
+    len_request = len(prefix) + (4 if(value is None) else 8) + len(suffix)
+    if(off + len_request > len(buf)):
+        raise ValueError(f'request of {len_request} bytes does not fit into the buffer')   # slice assignment would resize buf
+
+    n = off + len(prefix)
+    buf[off:n] = prefix
+
+    WriteHex4(buf, n, addr)
+    n += 4
+
+    if(value is not None):
+        WriteHex4(buf, n, value)
+        n += 4
+
+    buf[n:n+len(suffix)] = suffix
+    return n + len(suffix)
+
+# Assemble a request packet: <PP><AAAA>[VVVV]<X>/
+def BuildRequest(phy_addr, ext, addr, value = None):
+    prefix, suffix = GetRequestAffixes(phy_addr, ext)
+    buf = bytearray(16)
+    len_request = FormatRequest(buf, 0, prefix, addr, value, suffix)
+    return bytes(buf[:len_request])
+
+# Assemble the read requests for a whole address range into one buffer
+def BuildDumpRequests(phy_addr, ext, addr_start, addr_end):
+    prefix, suffix = GetRequestAffixes(phy_addr, ext)
+    buf = bytearray((len(prefix) + 4 + len(suffix)) * (addr_end - addr_start + 1))
+
+    off = 0
+    for addr in range(addr_start, addr_end+1):
+        off = FormatRequest(buf, off, prefix, addr, None, suffix)
+    return buf
+
+# Create the request function for one PHY address and ext mode, with everything that doesn't change
+# between requests (COM port, packet prefix and suffix, verbose) bound once:
+#   send(addr)                  read
+#   send(addr, value)           write
+#   send(addr, ..., wait=False) don't wait for the reply, it must be collected later with DrainReplies()
+# Returns the reply (see DrainReplies).
+def MakeSender(com_port, phy_addr, ext, verbose):
+    prefix, suffix = GetRequestAffixes(phy_addr, ext)
+
+    def send(addr, value = None, wait = True):
+        # assemble COM message
+        len_request = FormatRequest(_tx_buf, 0, prefix, addr, value, suffix)
+        pkt_request = memoryview(_tx_buf)[:len_request]
+
+        if(verbose == True):
+            print(bytes(pkt_request).decode('utf-8')+': ', end='')
+            #PrintRaw(pkt_request)
+
+        # Send to MSP
+        com_port.write(pkt_request)
+
+        if(wait):
+            return ReceiveRegReply(com_port)
+
+    return send
+
+def ReadWriteRegExtended(com_port, send, addr, value = None):   # send: see MakeSender(), without ext mode
+    REGCR = 0xD
+    ADDAR = 0xE
+
+    mmd = (addr & 0xF000) >> 12
+    if(mmd == 0):
+        mmd = 0x1F
+
+    # With pipeline, the whole sequence is sent back-to-back and the replies are collected at the end,
+    # so it costs a single round trip instead of one per request
+    wait = not pipeline
+    n_requests = 4
+
+    # Select MMD
+    send(REGCR, mmd, wait = wait)
+    
+    # Select address (TODO & 0xff ?)
+    send(ADDAR, addr, wait = wait)
+    
+    # Perform operation
+    send(REGCR, mmd | 0x4000, wait = wait) # Data, no increment
+
+    # Write value
+    if(value is not None):
+        send(ADDAR, value, wait = wait)
+        n_requests += 1
+    
+    # Read (back) value
+    if(pipeline):
+        send(ADDAR, wait = False)
+        return DrainReplies(com_port, n_requests)[-1]
+    else:
+        return send(ADDAR)
@@ -25,11 +25,10 @@
 
 import sys
 import serial
-import re
-import time
 
 # mine:
 import csv2regs as cr
+import mdio_core as mc
 
 
 help_str = """
@@ -99,9 +98,16 @@ For more documentation check https://github.com/NikoDelarich/USB2MDIO_PY
 
 # TODO: make it a config class, with description, name, and value. Easens pretty print and feedback on change.
 pretty_print = False
-verbose = False
 phy_addr = -1   # this is a decimal value
+reply_timeout = 0.5 # seconds to wait for a complete reply from the MSP
 regs_dict = {}  # index reg struct with phy_addr
+regs_index_dict = {}  # same, reorganized for pretty print (see cr.IndexRegs)
+com_port = None  # mc.SerialWorker, set up in main()
+board_verbose = None
+
+# request functions for the current PHY address (see mc.MakeSender), rebuilt by UpdateSenders() on config changes
+send = None         # current ext mode
+send_direct = None  # no ext mode, for the indirect access to extended registers
 
 ext = '='  # extended registers. Yes: '*', No: '='
 ext_dict = {
@@ -109,6 +115,10 @@ ext_dict = {
     '=': 'no'
 }
 
+# accepted values for yes/no options (config ext/pretty)
+_TRUE  = frozenset({'yes', 'y', 'YES', 'Y', 'true', 'True', '1'})
+_FALSE = frozenset({'no', 'n', 'NO', 'N', 'false', 'False', '0'})
+
 # ---------- Function definitions ----------
 
 def GetFirstString(str_list):
@@ -124,6 +134,8 @@ def PrintRaw(str):
     print()
 
 def GetRegResult(pkt_reply):
+    if(pkt_reply is None):
+        return [None, "No reply..."]
     if(pkt_reply[4] != 0x0a):
         return [None, "Invalid reply..."]
 
@@ -135,108 +147,59 @@ def GetRegResult(pkt_reply):
     #data = int(pkt_reply[0:4], 16)
     return ['0x' + data_str, None]
 
-def PrintRegResult(addr, pkt_reply):
-    if(pkt_reply[4] == 0x0a):
-        data_str = pkt_reply[0:4].decode('utf-8')
-        if(data_str):
-            if(pretty_print):
-                if(phy_addr in regs_dict.keys()):
-                    value = int(data_str, 16)
-                    cr.PrintRegPretty(regs_dict[phy_addr], addr, value)
+def PrintRegResult(addr, pkt_reply, reply_value = None):   # reply_value: already decoded reply, if any
+    if(pkt_reply is None):
+        print("No reply...")
+    elif(pkt_reply[4] == 0x0a):
+        if(pretty_print):
+            if(phy_addr in regs_index_dict.keys()):
+                value = reply_value if(reply_value is not None) else mc.Hex4(pkt_reply)
+                if(value is None):
+                    print("Invalid reply...")
                 else:
-                    str_temp = f"Pretty print is on and no register structure was given for PHY Address {phy_addr}...\n\rYou can disable pretty print with:\n\rconfig pretty no"
-                    print(str_temp)
+                    cr.PrintRegPretty(regs_index_dict[phy_addr], addr, value)
             else:
-                print('0x', data_str, sep='')
-                #PrintRaw(data_str)
-                #data = int(pkt_reply[0:4], 16)
+                str_temp = f"Pretty print is on and no register structure was given for PHY Address {phy_addr}...\n\rYou can disable pretty print with:\n\rconfig pretty no"
+                print(str_temp)
         else:
-            print("No reply...")
+            print('0x', pkt_reply[0:4].decode('utf-8'), sep='')
+            #PrintRaw(pkt_reply)
     else:
         print("Invalid reply...")
 
-def ReceiveRegReply():
-    global verbose
-
-    for i in range(0, 50):
-        pkt_reply = com_port.read(6)
-        if(len(pkt_reply) == 6):
-            break
-        time.sleep(0.01)
-    if(len(pkt_reply) != 6):
-        return None
-    
-    if(verbose == True):
-        print(pkt_reply.decode('utf-8'))
-
-    pkt_reply = [i for i in pkt_reply if i != 0xd]   # for whatever reason, MSP sends a carriage return within reply for addr 0x1
-    pkt_reply = bytes(pkt_reply)
-    return pkt_reply
-
-def SendMspRequest(com_port, phy_addr, ext, addr, value = None):
-    global verbose
-
-    # assemble COM message
-    if(value is None):
-        pkt_request = f'{phy_addr:02d}{addr:04x}'+ext+'/'
-    else:
-        pkt_request = f'{phy_addr:02d}{addr:04x}{value:04x}'+ext+'/'
-        
-    if(verbose == True):
-        print(pkt_request+': ', end='')
-        #PrintRaw(pkt_request)
-    
-    # Send to MSP
-    com_port.write(pkt_request.encode('utf-8'))
-
-    return ReceiveRegReply()
-
-def ReadWriteRegExtended(com_port, phy_addr, ext, addr, value = None):
-    REGCR = 0xD
-    ADDAR = 0xE
+def PrintRegCmd(addr, value, pkt_reply, reply_value = None):
+    if(not pretty_print):
+        if(value is None):
+            print("read 0x", f'{addr:04x}', ": ", sep='', end='')
+        else:
+            print("write 0x", f'{addr:04x}', ": ",  sep='', end='')
+    PrintRegResult(addr, pkt_reply, reply_value)
 
-    mmd = (addr & 0xF000) >> 12
-    if(mmd == 0):
-        mmd = 0x1F
-    
-    # Select MMD
-    SendMspRequest(com_port, phy_addr, ext, REGCR, mmd)
-    
-    # Select address (TODO & 0xff ?)
-    SendMspRequest(com_port, phy_addr, ext, ADDAR, addr)
-    
-    # Perform operation
-    SendMspRequest(com_port, phy_addr, ext, REGCR, mmd | 0x4000) # Data, no increment
+def UpdateSenders():
+    global send
+    global send_direct
 
-    # Write value
-    if(value is not None):
-        SendMspRequest(com_port, phy_addr, ext, ADDAR, value)
-    
-    # Read (back) value
-    return SendMspRequest(com_port, phy_addr, ext, ADDAR)
+    send = mc.MakeSender(com_port, phy_addr, ext, mc.verbose)
+    send_direct = mc.MakeSender(com_port, phy_addr, '=', mc.verbose)
 
-def RegCmd(com_port, phy_addr, addr, value, ext, quiet = False):
-    com_port.read(350) # Flush
+def RegCmd(addr, value, quiet = False):
+    com_port.reset_input_buffer() # Flush stale bytes (e.g. board verbose)
 
     if(addr > 31):
-        pkt_reply = ReadWriteRegExtended(com_port, phy_addr, "=", addr, value)
+        pkt_reply = mc.ReadWriteRegExtended(com_port, send_direct, addr, value)
     else:
-        pkt_reply = SendMspRequest(com_port, phy_addr, ext, addr, value)
+        pkt_reply = send(addr, value)
 
-    if(not pretty_print and not quiet):
-        if(value is None):
-            print("read 0x", f'{addr:04x}', ": ", sep='', end='')
-        else:
-            print("write 0x", f'{addr:04x}', ": ",  sep='', end='')
-        PrintRegResult(addr, pkt_reply)
+    if(not quiet):
+        PrintRegCmd(addr, value, pkt_reply)
 
     return pkt_reply
 
-def WriteReg(com_port, phy_addr, addr, value, ext, quiet = False):
-    return RegCmd(com_port, phy_addr, addr, value, ext, quiet)
+def WriteReg(addr, value, quiet = False):
+    return RegCmd(addr, value, quiet)
 
-def ReadReg(com_port, phy_addr, addr, ext, quiet = False):
-    return RegCmd(com_port, phy_addr, addr, None, ext, quiet)
+def ReadReg(addr, quiet = False):
+    return RegCmd(addr, None, quiet)
 
 # Unused. I'll leave it here just for future reference of a neat solution
 def ReadCleanLine(file):
@@ -258,16 +221,22 @@ def RwRegs(cmd, len_cmd):
         print("Invalid command...")
         return
 
+    if(not 0 <= addr <= 0xFFFF):
+        print("Invalid command...")
+        return
+
     # Get VALUE (if any)
     if(len_cmd == 2):
         try:
             value = int(cmd[1], 16)
-            WriteReg(com_port, phy_addr, addr, value, ext)
+            if(not 0 <= value <= 0xFFFF):
+                raise ValueError
+            WriteReg(addr, value)
         except ValueError:
             print("Invalid value...")
             return
     elif(len_cmd == 1):
-        ReadReg(com_port, phy_addr, addr, ext)
+        ReadReg(addr)
     else:
         print('Wrong number of args...')
 
@@ -290,10 +259,38 @@ def DumpRegs(cmd, len_cmd):
             print("Bad argument...")
             return
 
+        if(not 0 <= addr_start <= addr_end <= 0xFFFF):
+            print("Bad argument...")
+            return
+
+    # Directly accessible registers: send all requests at once and collect the replies afterwards
+    n_batched = 0
+    batch_end = min(addr_end, 31)
+    if(mc.pipeline and addr_start <= batch_end):
+        n_regs = batch_end - addr_start + 1
+        pkt_requests = mc.BuildDumpRequests(phy_addr, ext, addr_start, batch_end)
+
+        if(mc.verbose == True):
+            print(pkt_requests.decode('utf-8'))
+
+        com_port.reset_input_buffer() # Flush stale bytes (e.g. board verbose)
+        com_port.write(pkt_requests)
+
+        pkt_replies = mc.DrainReplies(com_port, n_regs)
+        reply_values = mc.DecodeReplies(pkt_replies)
+
+        # Replies are matched to the requests by position only. A reply lost somewhere in the batch shifts all
+        # later ones and only shows up as a missing reply at the end, so then none of them can be trusted:
+        # read the registers one by one instead
+        if(None not in pkt_replies):
+            for i in range(0, n_regs):
+                PrintRegCmd(addr_start + i, None, pkt_replies[i], reply_values[i])
+            n_batched = n_regs
+
     # TODO this would be a good place to use indirect read with auto post increment
     # But it may not be supported on all chips...
-    for my_addr in range(addr_start, addr_end+1):
-        ReadReg(com_port, phy_addr, my_addr, ext)
+    for my_addr in range(addr_start + n_batched, addr_end+1):
+        ReadReg(my_addr)
 
 def Config(usr_data, len_usr_data):
 
@@ -305,26 +302,35 @@ def Config(usr_data, len_usr_data):
     if(len_usr_data == 3):
         if(usr_data[1] == "phy"):
             try:
-                phy_addr = int(usr_data[2], 10)
+                new_phy_addr = int(usr_data[2], 10)
+                if(not 0 <= new_phy_addr <= 31):   # MDIO has 5 bit PHY addresses
+                    raise ValueError
+                phy_addr = new_phy_addr
+                mc.ClearPrefixCache()
+                UpdateSenders()
                 print("PHY addr = "+f'{phy_addr:02d}')
             except ValueError:
                 print("Invalid PHY address...")
                 return
         elif(usr_data[1] == "ext"):
             try:
-                if(usr_data[2] in ('yes', 'y', 'YES', 'Y', 'true', 'True', '1')):
+                if(usr_data[2] in _TRUE):
                     ext = '*'
-                elif(usr_data[2] in ('no', 'n', 'NO', 'n', 'false', 'False', '0')):
+                    mc.ClearPrefixCache()
+                    UpdateSenders()
+                elif(usr_data[2] in _FALSE):
                     ext = '='
+                    mc.ClearPrefixCache()
+                    UpdateSenders()
                 print("Extended register mode: "+ext_dict[ext])
             except ValueError:
                 print("Invalid Ext mode...")
                 return
         elif(usr_data[1] == "pretty"):
             try:
-                if(usr_data[2] in ('yes', 'y', 'YES', 'Y', 'true', 'True', '1')):
+                if(usr_data[2] in _TRUE):
                     pretty_print = True
-                elif(usr_data[2] in ('no', 'n', 'NO', 'n', 'false', 'False', '0')):
+                elif(usr_data[2] in _FALSE):
                     pretty_print = False
                 print("Pretty print: "+f'{pretty_print}')
             except ValueError:
@@ -336,102 +342,188 @@ def Config(usr_data, len_usr_data):
         print("Extended register mode: "+ext_dict[ext])
         print("Pretty print: "+f'{pretty_print}')
 
-def CmdDecision(cmd):
+def PrintPhyFound(i, pkt_reply):   # i: PHY address, pkt_reply: its PHYIDR2
     global phy_addr
 
-    len_cmd = len(cmd)
+    print("PHYID {}... ".format(i), end='')
+    result = GetRegResult(pkt_reply)
+    if(result[0] is None):
+        print(result[1])
+        return
 
-    if(cmd[0] == "scan"):
-        print("Scanning for PHYs...")
-        for i in range(0, 16):
-            print("PHYID {}... ".format(i), end='')
-            pkt_reply = ReadReg(com_port, i, 0x03, ext, quiet = True) # PHYIDR2
-            result = GetRegResult(pkt_reply)
-            if(result[0] is None):
-                print(result[1])
-                continue
-            if(result[0] == "0000" or result[0] == "FFFF"):
-                print("Not found")
-                continue
-
-            # TODO This is a bit lazy - we should check PHYIDR1 *and* 2 and ignore the revision bit
-            # DP83822:   PHYIDR1 (2): 0x2000, PHYIDR2 (3): 0xA240 --> OUI: 0x2000A24x
-            # DP83TD510: PHYIDR1 (2): 0x2000, PHYIDR2 (3): 0x0181 --> OUI: 0x2000018x
-            if(result[0] == "0xA240"):
-                type = "DP83822"
-            elif(result[0] == "0x0181"):
-                type = "DP83TD510"
-            else:
-                type = "Unknown"
+    phy_id = mc.Hex4(pkt_reply)
+    if(phy_id is None):
+        print("Invalid reply...")
+        return
+    if(phy_id == 0x0000 or phy_id == 0xFFFF):
+        print("Not found")
+        return
 
-            if(phy_addr == -1):
-                phy_addr = i
-                print(f'Found "{type}" & selected!')
-            else:
-                print(f'Found "{type}"!')
-    elif(cmd[0] == "script"):
-        try:
-            path = cmd[1]
-            print("Reading file:" + path )
-
-            file = open(path, 'r')
-            ExecScript(file)
-            file.close()
-        except FileNotFoundError:
-            print("Invalid file or file path...")
-            return
-    elif(cmd[0] == "regs"):
-        try:
-            path = cmd[1]
-            print("Reading file:" + path )
+    # TODO This is a bit lazy - we should check PHYIDR1 *and* 2 and ignore the revision bit
+    # DP83822:   PHYIDR1 (2): 0x2000, PHYIDR2 (3): 0xA240 --> OUI: 0x2000A24x
+    # DP83TD510: PHYIDR1 (2): 0x2000, PHYIDR2 (3): 0x0181 --> OUI: 0x2000018x
+    if(phy_id == 0xA240):
+        type = "DP83822"
+    elif(phy_id == 0x0181):
+        type = "DP83TD510"
+    else:
+        type = "Unknown"
+
+    if(phy_addr == -1):
+        phy_addr = i
+        UpdateSenders()
+        print(f'Found "{type}" & selected!')
+    else:
+        print(f'Found "{type}"!')
 
-            regs = cr.csv2regs(path)
+def ScanPhys(cmd, len_cmd):
+    print("Scanning for PHYs...")
 
-            regs_dict[phy_addr] = regs
-        except IndexError:
-            if(phy_addr in regs_dict.keys()):
-                cr.PrintRegs(regs_dict[phy_addr])
-            else:
-                str_temp = f"No register structure was given for PHY Address {phy_addr}..."
-                print(str_temp)
-        except FileNotFoundError:
-            print("Invalid file or file path...")
-            return
-    elif(cmd[0] == "info"):
-        if(board_verbose):
-            print(board_verbose.decode('utf-8'))
+    # Read PHYIDR2 of all 32 MDIO addresses at once and collect the replies afterwards
+    n_phys = 32
+    pkt_replies = [None] * n_phys
+    if(mc.pipeline):
+        pkt_requests = b''.join([mc.BuildRequest(i, ext, 0x03) for i in range(0, n_phys)])
+
+        if(mc.verbose == True):
+            print(pkt_requests.decode('utf-8'))
+
+        com_port.reset_input_buffer() # Flush stale bytes (e.g. board verbose)
+        com_port.write(pkt_requests)
+
+        pkt_replies = mc.DrainReplies(com_port, n_phys)
+
+    # Replies are matched to the requests by position only. A reply lost somewhere in the batch shifts all
+    # later ones (and could select the wrong PHY), so then none of them can be trusted: ask PHY by PHY instead
+    if(None in pkt_replies):
+        for i in range(0, n_phys):
+            com_port.reset_input_buffer() # Flush stale bytes
+            pkt_replies[i] = mc.MakeSender(com_port, i, ext, mc.verbose)(0x03) # PHYIDR2
+
+    for i in range(0, n_phys):
+        PrintPhyFound(i, pkt_replies[i])
+
+def RunScript(cmd, len_cmd):
+    try:
+        path = cmd[1]
+        print("Reading file:" + path )
+
+        file = open(path, 'r')
+        ExecScript(file)
+        file.close()
+    except FileNotFoundError:
+        print("Invalid file or file path...")
+        return
+
+def LoadRegs(cmd, len_cmd):
+    try:
+        path = cmd[1]
+        print("Reading file:" + path )
+
+        regs = cr.csv2regs(path)
+
+        regs_dict[phy_addr] = regs
+        regs_index_dict[phy_addr] = cr.IndexRegs(regs)
+    except IndexError:
+        if(phy_addr in regs_dict.keys()):
+            cr.PrintRegs(regs_dict[phy_addr])
         else:
-            print("Board didn't send any info (verbose)...")
-    elif(cmd[0] == "config"):
-        Config(cmd, len_cmd)  
-    elif(cmd[0] == "phy"): # shortcut
-        Config(["config", cmd[0], cmd[1]], 3)
-    elif(cmd[0] == "dump"):
-        DumpRegs(cmd, len_cmd)
-    elif(cmd[0] in ("exit", "exit()", "quit", "quit()", "q")):
-        com_port.close()
-        quit()
-    elif(cmd[0] in ("help", "--help", "h", "-h", "?")):
-        print(help_str)
+            str_temp = f"No register structure was given for PHY Address {phy_addr}..."
+            print(str_temp)
+    except FileNotFoundError:
+        print("Invalid file or file path...")
+        return
+
+def ShowInfo(cmd, len_cmd):
+    if(board_verbose):
+        print(board_verbose.decode('utf-8'))
+    else:
+        print("Board didn't send any info (verbose)...")
+
+def SelectPhy(cmd, len_cmd): # shortcut
+    Config(["config", cmd[0], cmd[1]], 3)
+
+def Quit(cmd, len_cmd):
+    com_port.close()
+    quit()
+
+def ShowHelp(cmd, len_cmd):
+    print(help_str)
+
+# CLI/script commands, indexed with the command name. Anything else is a register access (RwRegs)
+_CMDS = {
+    'scan':   ScanPhys,
+    'script': RunScript,
+    'regs':   LoadRegs,
+    'info':   ShowInfo,
+    'config': Config,
+    'phy':    SelectPhy,
+    'dump':   DumpRegs,
+    'exit':   Quit,
+    'exit()': Quit,
+    'quit':   Quit,
+    'quit()': Quit,
+    'q':      Quit,
+    'help':   ShowHelp,
+    '--help': ShowHelp,
+    'h':      ShowHelp,
+    '-h':     ShowHelp,
+    '?':      ShowHelp,
+}
+
+def CmdDecision(cmd):
+    len_cmd = len(cmd)
+
+    handler = _CMDS.get(cmd[0])
+    if(handler):
+        handler(cmd, len_cmd)
 
     # ---------- R/W Registers ----------
     else:
         RwRegs(cmd, len_cmd)
 
+# Register accesses for scripts. The COM port isn't flushed before each access (see ExecScript)
+def ScriptRegularAccess(addr, value):
+    pkt_reply = send(addr, value)
+    PrintRegCmd(addr, value, pkt_reply)
+
+def ScriptExtendedAccess(addr, value):
+    pkt_reply = mc.ReadWriteRegExtended(com_port, send_direct, addr, value)
+    PrintRegCmd(addr, value, pkt_reply)
+
+# Turn a script line into an operation (function, arg_0, arg_1), executed with function(arg_0, arg_1)
+def CompileScriptCmd(cmd):
+    len_cmd = len(cmd)
+
+    handler = _CMDS.get(cmd[0])
+    if(handler):
+        return (handler, cmd, len_cmd)
+
+    if(len_cmd > 2):
+        return (RwRegs, cmd, len_cmd)   # let RwRegs complain when executed
+
+    try:
+        addr = int(cmd[0], 16)
+        value = int(cmd[1], 16) if(len_cmd == 2) else None
+    except ValueError:
+        return (RwRegs, cmd, len_cmd)   # let RwRegs complain when executed
+
+    if(not 0 <= addr <= 0xFFFF or (value is not None and not 0 <= value <= 0xFFFF)):
+        return (RwRegs, cmd, len_cmd)   # let RwRegs complain when executed
+
+    if(addr > 31):
+        return (ScriptExtendedAccess, addr, value)
+    else:
+        return (ScriptRegularAccess, addr, value)
+
 def ExecScript(file):   # file: file handler of the opened file
 
     bad_fmt_str = 'Bad file format. '
 
     conts = file.read()
-    conts = re.split('\n|\r|\n\r|\r\n', conts)
-
-    cmds = []
-
-    for i in range(0,len(conts)):
-        temp = conts[i].split('//',1)[0]
-        if(temp != ''):
-            cmds.append(temp)
 
+    # one entry per non-empty line, comments stripped
+    cmds = [cmd for cmd in (line.partition('//')[0].strip() for line in conts.splitlines()) if cmd]
 
     if('begin' in cmds[:1] and 'end' in cmds[-1:]):
         # All good, treat commands
@@ -440,10 +532,13 @@ def ExecScript(file):   # file: file handler of the opened file
         del cmds[:1]
         del cmds[-1:]
 
-        for cmd in cmds:
-            cmd = cmd.split()
+        # Decide once per line what has to be done, then run through the prepared operations
+        ops = [CompileScriptCmd(cmd.split()) for cmd in cmds]
 
-            CmdDecision(cmd)
+        com_port.reset_input_buffer() # Flush stale bytes once for the whole script
+
+        for fn, arg_0, arg_1 in ops:
+            fn(arg_0, arg_1)
 
     else:
         # Wrong format, abort
@@ -451,46 +546,72 @@ def ExecScript(file):   # file: file handler of the opened file
         return
 
 # ---------- Check arguments ----------
-len_argv = len(sys.argv)
-if(len_argv==1):
-    print(help_str)
-    quit()
-elif(sys.argv[1] == "--help" or sys.argv[1] == "-h"):
-    print(help_str)
-    quit()
-elif(len_argv>=2):
-    # ---------- Open COM Port ----------
-    com_port = serial.Serial(sys.argv[1], 9600, timeout=.01)
-
-    # ---------- Read board verbose ----------
-    board_verbose = bytearray(b'')
-    while(1):
-        temp_data = com_port.read(350)
-        board_verbose.extend(temp_data)
-        if(not temp_data):
-            break
-
-    if(len_argv==3):
+def main():
+    global com_port
+    global board_verbose
+
+    len_argv = len(sys.argv)
+    if(len_argv==1):
+        print(help_str)
+        quit()
+    elif(sys.argv[1] == "--help" or sys.argv[1] == "-h"):
+        print(help_str)
+        quit()
+    elif(len_argv>=2):
+        # ---------- Open COM Port ----------
+        com_port = serial.Serial()
+        com_port.port = sys.argv[1]
+        com_port.baudrate = 9600
+        com_port.timeout = .2
+        com_port.dtr = False    # applied on open(), keeps adapters wired to the reset line from rebooting the board
+        com_port.rts = False
+        com_port.open()
+
         try:
-            path = sys.argv[2]
-            print("Reading file:" + path )
-
-            file = open(path, 'r')
-            ExecScript(file)
-            file.close()
-        except FileNotFoundError:
-            print("Invalid file or file path...")
-    elif(len_argv==2):
-        # ---------- Parse user inputs ----------
-        while(1):
-            usr_data_raw = input("PHYID " + str(phy_addr) + " > ")
-
-            usr_data = usr_data_raw.split()
-            len_usr_data = len(usr_data)
-
-            if(len_usr_data==0):
-                continue
-            else:
-                CmdDecision(usr_data)
-    else:
-        print("Too many arguments... try 'help'")
+            com_port.set_buffer_size(rx_size=65536)     # only available on Windows
+        except AttributeError:
+            pass
+
+        # ---------- Read board verbose ----------
+        board_verbose = bytearray(com_port.read(65536))
+        com_port.timeout = .01
+        while(1):   # the rest, until the board goes quiet
+            temp_data = com_port.read(65536)
+            board_verbose.extend(temp_data)
+            if(not temp_data):
+                break
+
+        com_port.timeout = reply_timeout
+
+        # from here on, all COM port I/O goes through the worker threads
+        com_port = mc.SerialWorker(com_port, reply_timeout)
+        com_port.start()
+        UpdateSenders()
+
+        if(len_argv==3):
+            try:
+                path = sys.argv[2]
+                print("Reading file:" + path )
+
+                file = open(path, 'r')
+                ExecScript(file)
+                file.close()
+            except FileNotFoundError:
+                print("Invalid file or file path...")
+        elif(len_argv==2):
+            # ---------- Parse user inputs ----------
+            while(1):
+                usr_data_raw = input("PHYID " + str(phy_addr) + " > ")
+
+                usr_data = usr_data_raw.split()
+                len_usr_data = len(usr_data)
+
+                if(len_usr_data==0):
+                    continue
+                else:
+                    CmdDecision(usr_data)
+        else:
+            print("Too many arguments... try 'help'")
+
+if __name__ == "__main__":
+    main()